@@ -58,7 +58,11 @@
 from abc import abstractmethod
 import click
 import os
+import queue
+import re
 import signal
+import threading
+import time
 from typing import Iterable, List
 
 import aiko_services as aiko
@@ -74,6 +78,11 @@ _HYPERSPACE_NAME = "chat_space"
 _ROBOT_NAMES = ["laika", "oscar"]
 _VERSION = 0
 
+_BATCH_FLUSH_SECONDS = 0.005  # maximum wait before flushing queued messages
+_BATCH_MAX_MESSAGES = 64      # maximum messages per send_messages() call
+
+_SERVER_CACHE_TTL_SECONDS = 20.0  # discovered ChatServer entry lifetime
+
 _ACTOR_REPL = "chat_repl"
 _PROTOCOL_REPL = f"{aiko.SERVICE_PROTOCOL_AIKO}/{_ACTOR_REPL}:{_VERSION}"
 
@@ -82,9 +91,15 @@ _PROTOCOL_SERVER = f"{aiko.SERVICE_PROTOCOL_AIKO}/{_ACTOR_SERVER}:{_VERSION}"
 
 # --------------------------------------------------------------------------- #
 
+# Built once: the filter never varies, so callers (and any identity-keyed
+# caches underneath) always see the same instance
+_SERVER_SERVICE_FILTER = aiko.ServiceFilter(
+    "*", _ACTOR_SERVER, _PROTOCOL_SERVER, "*", "*", "*")
+
+_RECIPIENTS_SPLIT = re.compile(r"\s*,\s*")  # split and strip in one pass
+
 def get_server_service_filter():
-    return aiko.ServiceFilter(
-        "*", _ACTOR_SERVER, _PROTOCOL_SERVER, "*", "*", "*")
+    return _SERVER_SERVICE_FILTER
 
 def generate_recipients(recipients: Iterable[str] | None) -> str:
     if not recipients:
@@ -94,7 +109,7 @@ def generate_recipients(recipients: Iterable[str] | None) -> str:
 def parse_recipients(recipients: str | None) -> List[str]:
     if not recipients:
         return []
-    return list(filter(None, map(str.strip, recipients.split(","))))
+    return [r for r in _RECIPIENTS_SPLIT.split(recipients.strip()) if r]
 
 # --------------------------------------------------------------------------- #
 # Aiko ChatREPL: Interface and Implementation
@@ -108,7 +123,15 @@ class ChatREPLImpl(aiko.Actor):
         self.share["source_file"] = f"v{_VERSION}⇒ {__file__}"
 
         self.chat_server = None
-        
+        self._server_cache = {}  # topic_path --> (service, expiry_monotonic)
+        self._server_lock = threading.Lock()
+        self._server_pick = None  # topic_path of the last server used
+
+        self._tx_queue = queue.Queue()  # batches outbound send_message() calls
+        self._tx_thread = threading.Thread(
+            target=self._tx_flusher, name="chat_tx_flusher", daemon=True)
+        self._tx_thread.start()
+
         self.username = username or os.environ.get("USER")
         self.current_channel = _CHANNEL_NAME
         self.history_store = None
@@ -155,25 +178,107 @@ class ChatREPLImpl(aiko.Actor):
         elif command in [":list_channels", ":lc"]:
             self.print("general, llm, random, robot, yolo")
         else:
-            if self.chat_server:
-                admin = ""
-                recipients = [self.current_channel]
-                self.chat_server.send_message(
-                    self.username, recipients, command_line)
+            recipients = (self.current_channel,)
+            self._tx_queue.put((recipients, command_line))
+
+    def _tx_flusher(self):
+        """Drain queued messages and send each batch as one actor call"""
+
+        while True:
+            recipients, message = self._tx_queue.get()
+            batches = {recipients: [message]}
+            deadline = time.monotonic() + _BATCH_FLUSH_SECONDS
+            count = 1
+            while count < _BATCH_MAX_MESSAGES:
+                if self._tx_queue.qsize():
+                    # Sole consumer: a length check plus get_nowait() drains
+                    # a burst without raising queue.Empty per message
+                    recipients, message = self._tx_queue.get_nowait()
+                else:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        recipients, message = self._tx_queue.get(
+                            timeout=timeout)
+                    except queue.Empty:
+                        break
+                batches.setdefault(recipients, []).append(message)
+                count += 1
+
+            chat_server = self._pick_server()
+            if not chat_server:
+                continue
+            for recipients, messages in batches.items():
+                try:
+                    if len(messages) == 1:
+                        chat_server.send_message(
+                            self.username, list(recipients), messages[0])
+                    else:
+                        chat_server.send_messages(
+                            self.username, list(recipients), tuple(messages))
+                except Exception as exception:
+                    # Report and continue: a proxy failure (e.g. MQTT
+                    # disconnect mid-publish) must not kill the flusher
+                    self.print(
+                        f"[send error] {type(exception).__name__}: "
+                        f"{exception}")
 
     def discovery_add_handler(self, service_details, service):
-        self.print(f"Connected {service_details[1]}: {service_details[0]}")
+        topic_path = service_details[0]
+        expiry = time.monotonic() + _SERVER_CACHE_TTL_SECONDS
+        with self._server_lock:
+            known = topic_path in self._server_cache
+            self._server_cache[topic_path] = (service, expiry)
+        if known:  # add event refreshes the expiry, nothing to re-wire
+            return
+        self.print(f"Connected {service_details[1]}: {topic_path}")
         self.chat_server = service
-        self.chat_server_topic_path = service_details[0]
+        self.chat_server_topic_path = topic_path
         self.chat_server_topic =  \
             f"{self.chat_server_topic_path}/{self.current_channel}"
         self.add_message_handler(
             self.server_message_handler, self.chat_server_topic)
 
     def discovery_remove_handler(self, service_details):
-        self.print(f"Disconnected {service_details[1]}: {service_details[0]}")
+        topic_path = service_details[0]
+        with self._server_lock:
+            self._server_cache.pop(topic_path, None)
+            if self._server_pick == topic_path:
+                self._server_pick = None
+        self.print(f"Disconnected {service_details[1]}: {topic_path}")
         self.chat_server = None
 
+    def _pick_server(self):
+        """Return a discovered ChatServer, preferring the last pick.
+
+        The TTL is soft: discovery add events are edge-triggered (fired
+        once when a service appears), so an entry past its expiry is
+        merely stale, not gone.  Entries only leave the cache on an
+        actual discovery remove event; stale ones remain usable as a
+        fallback when nothing fresh is known.
+        """
+        now = time.monotonic()
+        with self._server_lock:
+            cache = self._server_cache
+            if not cache:
+                self._server_pick = None
+                return None
+            picked = cache.get(self._server_pick)
+            if picked is not None and picked[1] > now:
+                return picked[0]
+            for topic_path, (service, expiry) in cache.items():
+                if expiry > now:
+                    self._server_pick = topic_path
+                    return service
+            # Everything is stale: keep the current pick if still known,
+            # otherwise fall back to the most recently added entry
+            if picked is not None:
+                return picked[0]
+            topic_path = next(reversed(cache))
+            self._server_pick = topic_path
+            return cache[topic_path][0]
+
     def join(self):
         self.repl_session.join()  # wait until background thread has cleaned-up
 
@@ -204,6 +309,10 @@ class ChatServer(aiko.Actor):
     def send_message(self, username, recipients, message):
         pass
 
+    @abstractmethod
+    def send_messages(self, username, recipients, messages):
+        pass
+
 class ChatServerImpl(aiko.Actor):
     def __init__(self, context, llm_enabled=False):
         context.call_init(self, "Actor", context)
@@ -236,7 +345,15 @@ class ChatServerImpl(aiko.Actor):
 
     def send_message(self, username, recipients, message):
         self.logger.info(f"send_message({username} > {recipients}: {message})")
+        self._deliver_message(username, recipients, message)
+
+    def send_messages(self, username, recipients, messages):
+        self.logger.info(
+            f"send_messages({username} > {recipients}: {len(messages)} messages)")
+        for message in messages:
+            self._deliver_message(username, recipients, message)
 
+    def _deliver_message(self, username, recipients, message):
         command_line = message.strip()
         if command_line:
             tokens = command_line.split(" ")
@@ -3,15 +3,15 @@
 """
 Thread-safe raw-TTY REPL with:
 - Readline-ish editing (arrows, history, home/end, delete, etc.)
-- Async messages via a thread-safe queue (external producers just .put(str))
+- Async messages via a lock-free deque (producers use session.post_message())
 - SIGWINCH resize handling (redraw)
 - Optional history persistence hook
 - Renderer that supports line-wrapping for long input (multi-row prompt+buffer)
 
 Design guarantees:
 - Single-writer rule: ONLY the REPL thread writes to stdout.
-- External threads communicate ONLY via queue.Queue
-    (session.message_queue or session.post_message()).
+- External threads communicate ONLY via session.post_message()
+    (or post_message_bytes() for pre-encoded payloads).
 - Editor state is confined to the REPL thread.
 - No asyncio.
 
@@ -35,22 +35,25 @@ Example main thread integration:
     session.join()   # or session.finished.wait()
 
 Example external producer:
-    def producer(q):
+    def producer(session):
         while True:
-            q.put("hello from elsewhere")
+            session.post_message("hello from elsewhere")
             time.sleep(1)
 """
 
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import os
-import queue
 import select
+import selectors
 import shutil
+import signal
 import sys
 import termios
 import threading
 import time
-import tty
+import unicodedata
 from typing import Callable, Optional, Protocol, List
 
 __all__ = ["FileHistoryStore", "ReplSession"]
@@ -85,28 +88,79 @@ class Key:
     CTRL_N = "ctrl_n"
 
 
-@dataclass(frozen=True)
 class KeyEvent:
-    kind: str
-    text: str = ""  # for Key.CHAR
+    """
+    Decoded keypress.  A plain __slots__ class rather than a dataclass:
+    every non-CHAR kind maps to one pre-built singleton in _KEY_SINGLETONS,
+    so only CHAR events (whose text varies) allocate per keystroke.
+    """
+    __slots__ = ("kind", "text")
+
+    def __init__(self, kind: str, text: str = ""):
+        self.kind = kind
+        self.text = text  # for Key.CHAR
+
+    def __repr__(self) -> str:
+        return f"KeyEvent({self.kind!r}, {self.text!r})"
+
+
+_KEY_SINGLETONS = {
+    kind: KeyEvent(kind)
+    for kind in (
+        Key.ENTER, Key.BACKSPACE, Key.DELETE, Key.ESC,
+        Key.LEFT, Key.RIGHT, Key.UP, Key.DOWN, Key.HOME, Key.END,
+        Key.CTRL_C, Key.CTRL_A, Key.CTRL_E, Key.CTRL_U,
+        Key.CTRL_K, Key.CTRL_W, Key.CTRL_P, Key.CTRL_N,
+    )
+}
 
 
 # =============================================================================
 # Raw TTY
 # =============================================================================
 
+_BRACKETED_PASTE_ON = b"\x1b[?2004h"
+_BRACKETED_PASTE_OFF = b"\x1b[?2004l"
+
 class RawTTY:
-    """Context manager to put stdin into raw mode and restore it."""
+    """
+    Context manager to put stdin into raw mode and restore it.
+
+    Flips the raw-mode flags in place - one tcgetattr + one tcsetattr,
+    where tty.setraw() does a second tcgetattr internally - and enables
+    bracketed paste so KeyStream receives a paste as one delimited burst.
+    """
     def __init__(self, fd: int):
         self.fd = fd
         self._old = None
+        # fileno() is a TextIOWrapper method call; resolve it once here
+        self._out_fd = sys.stdout.fileno()
 
     def __enter__(self):
-        self._old = termios.tcgetattr(self.fd)
-        tty.setraw(self.fd, when=termios.TCSANOW)
+        old = termios.tcgetattr(self.fd)
+        self._old = old
+        new = list(old)
+        new[0] &= ~(termios.BRKINT | termios.ICRNL | termios.INPCK |
+                    termios.ISTRIP | termios.IXON)
+        new[1] &= ~termios.OPOST
+        new[2] = (new[2] & ~termios.CSIZE) | termios.CS8
+        new[3] &= ~(termios.ECHO | termios.ICANON | termios.IEXTEN |
+                    termios.ISIG)
+        new[6] = list(new[6])
+        new[6][termios.VMIN] = 1
+        new[6][termios.VTIME] = 0
+        termios.tcsetattr(self.fd, termios.TCSANOW, new)
+        try:
+            os.write(self._out_fd, _BRACKETED_PASTE_ON)
+        except OSError:
+            pass
         return self
 
     def __exit__(self, exc_type, exc, tb):
+        try:
+            os.write(self._out_fd, _BRACKETED_PASTE_OFF)
+        except OSError:
+            pass
         if self._old is not None:
             termios.tcsetattr(self.fd, termios.TCSANOW, self._old)
 
@@ -122,6 +176,16 @@ class HistoryStore(Protocol):
     def save(self, history: List[str]) -> None:
         ...
 
+    def append(self, line: str) -> None:
+        """Persist one committed line (O(1) fast path).
+
+        ReplSession probes for this with getattr(): a store that provides
+        it gets per-commit persistence and save() is only used to compact;
+        a store without it falls back to one save() of the full history at
+        shutdown.
+        """
+        ...
+
 
 class FileHistoryStore:
     """
@@ -131,112 +195,229 @@ class FileHistoryStore:
     def __init__(self, path: str, max_entries: int = 2000):
         self.path = path
         self.max_entries = max_entries
+        self._appends_since_compact = 0
+        # In-memory dedup set, ordered oldest-first.  Maintained per append
+        # so compaction never has to rescan the file for duplicates.
+        self._entries: Optional["OrderedDict[str, None]"] = None
 
     def load(self) -> List[str]:
         try:
             with open(self.path, "r", encoding="utf-8") as f:
                 lines = [ln.rstrip("\n") for ln in f]
-            # Keep last max_entries
-            if self.max_entries and len(lines) > self.max_entries:
-                lines = lines[-self.max_entries :]
-            return [ln for ln in lines if ln.strip()]
         except FileNotFoundError:
-            return []
+            lines = []
         except Exception:
             # Fail closed: don't crash REPL due to history
             return []
+        # Dedup keeping the most recent occurrence, then tail-trim
+        entries: "OrderedDict[str, None]" = OrderedDict()
+        for ln in lines:
+            if ln.strip():
+                entries.pop(ln, None)
+                entries[ln] = None
+        while self.max_entries and len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        self._entries = entries
+        return list(entries)
 
     def save(self, history: List[str]) -> None:
+        # Write-then-rename so a crash mid-rewrite never loses the old file;
+        # one fsync batches the whole rewrite's durability.
         try:
             os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
             hist = history
             if self.max_entries and len(hist) > self.max_entries:
                 hist = hist[-self.max_entries :]
-            with open(self.path, "w", encoding="utf-8") as f:
-                for ln in hist:
-                    f.write(ln.replace("\n", " ") + "\n")
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(ln.replace("\n", " ") + "\n" for ln in hist))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
         except Exception:
             # Fail closed: don't crash REPL due to history
             pass
 
+    def append(self, line: str) -> None:
+        """O(1) persistence of one committed line (vs save()'s full rewrite).
+
+        Opened in append mode so concurrent REPLs don't clobber each other.
+        The in-memory OrderedDict dedups as it goes (a repeat just moves to
+        the end), so the periodic compaction (every max_entries // 4
+        appends, floored at 64) can rewrite the file straight from memory
+        without rereading it.  An unbounded store (max_entries=0) never
+        compacts: there is no tail to trim.
+        """
+        line = line.replace("\n", " ")
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8", buffering=1) as f:
+                f.write(line + "\n")
+        except Exception:
+            # Fail closed: don't crash REPL due to history
+            return
+        entries = self._entries
+        if entries is None:
+            self.load()  # seeds self._entries from the file
+            entries = self._entries
+        if line in entries:
+            entries.move_to_end(line)
+        else:
+            entries[line] = None
+            if self.max_entries and len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        if not self.max_entries:
+            return
+        self._appends_since_compact += 1
+        if self._appends_since_compact > max(64, self.max_entries // 4):
+            self._appends_since_compact = 0
+            self.save(list(entries))
+
 
 # =============================================================================
 # Editor (readline-ish)
 # =============================================================================
 
 class LineEditor:
-    def __init__(self):
-        self.buf = ""
-        self.pos = 0
-
-        self.history: list[str] = []
+    """
+    Gap buffer editor: the line is held as two UTF-8 bytearrays either side
+    of the cursor, so insert/backspace at the cursor are O(1) appends/pops
+    instead of rebuilding an immutable str per keystroke.  `buf` reconstructs
+    the str lazily (cached until the next edit) for the renderer.
+    """
+    def __init__(self, history_size: int = 2000):
+        self._left = bytearray()   # bytes before the cursor
+        self._right = bytearray()  # bytes after the cursor
+        self._pos = 0              # cursor position, in characters
+        self._total = 0            # line length, in characters
+        self._buf_cache: Optional[str] = None
+
+        # Bounded ring: deque(maxlen) trims the oldest entry in O(1)
+        self.history: "deque[str]" = deque(maxlen=history_size)
         self.hist_index: Optional[int] = None
         self.hist_saved_current: str = ""
+        self._hist_snapshot: Optional[List[str]] = None
 
         self.kill_buffer: str = ""
 
+        # Optional persistence hook, called with each newly committed line
+        self.on_commit: Optional[Callable[[str], None]] = None
+
+    @property
+    def buf(self) -> str:
+        if self._buf_cache is None:
+            self._buf_cache = (self._left + self._right).decode(
+                "utf-8", errors="replace")
+        return self._buf_cache
+
+    @property
+    def pos(self) -> int:
+        return self._pos
+
+    def _left_char_start(self) -> int:
+        # Start index of the last UTF-8 character in self._left
+        i = len(self._left) - 1
+        while i > 0 and 0x80 <= self._left[i] < 0xC0:
+            i -= 1
+        return i
+
+    def _right_char_end(self) -> int:
+        # End index (exclusive) of the first UTF-8 character in self._right
+        n = 1
+        while n < len(self._right) and 0x80 <= self._right[n] < 0xC0:
+            n += 1
+        return n
+
     def set_line(self, text: str) -> None:
-        self.buf = text
-        self.pos = len(text)
+        self._left = bytearray(text.encode("utf-8"))
+        self._right = bytearray()
+        self._pos = self._total = len(text)
+        self._buf_cache = text
 
     def insert(self, s: str) -> None:
         if not s:
             return
-        self.buf = self.buf[:self.pos] + s + self.buf[self.pos:]
-        self.pos += len(s)
+        self._left += s.encode("utf-8")
+        self._pos += len(s)
+        self._total += len(s)
+        self._buf_cache = None
 
     def backspace(self) -> None:
-        if self.pos <= 0:
+        if not self._left:
             return
-        self.buf = self.buf[:self.pos - 1] + self.buf[self.pos:]
-        self.pos -= 1
+        del self._left[self._left_char_start():]
+        self._pos -= 1
+        self._total -= 1
+        self._buf_cache = None
 
     def delete(self) -> None:
-        if self.pos >= len(self.buf):
+        if not self._right:
             return
-        self.buf = self.buf[:self.pos] + self.buf[self.pos + 1:]
+        del self._right[:self._right_char_end()]
+        self._total -= 1
+        self._buf_cache = None
 
     def move_left(self) -> None:
-        if self.pos > 0:
-            self.pos -= 1
+        if self._pos > 0:
+            i = self._left_char_start()
+            self._right[:0] = self._left[i:]
+            del self._left[i:]
+            self._pos -= 1
 
     def move_right(self) -> None:
-        if self.pos < len(self.buf):
-            self.pos += 1
+        if self._pos < self._total:
+            n = self._right_char_end()
+            self._left += self._right[:n]
+            del self._right[:n]
+            self._pos += 1
 
     def home(self) -> None:
-        self.pos = 0
+        self._right[:0] = self._left
+        self._left.clear()
+        self._pos = 0
 
     def end(self) -> None:
-        self.pos = len(self.buf)
+        self._left += self._right
+        self._right.clear()
+        self._pos = self._total
 
     def kill_line(self) -> None:  # Ctrl-U
-        self.buf = ""
-        self.pos = 0
+        self._left.clear()
+        self._right.clear()
+        self._pos = self._total = 0
+        self._buf_cache = None
         self.hist_index = None
+        self._hist_snapshot = None
 
     def kill_to_end(self) -> None:  # Ctrl-K
-        if self.pos >= len(self.buf):
+        if not self._right:
             self.kill_buffer = ""
             return
-        self.kill_buffer = self.buf[self.pos:]
-        self.buf = self.buf[:self.pos]
+        self.kill_buffer = self._right.decode("utf-8", errors="replace")
+        self._right.clear()
+        self._total = self._pos
+        self._buf_cache = None
 
     def backward_kill_word(self) -> None:  # Ctrl-W
-        if self.pos == 0:
+        if self._pos == 0:
             return
-        i = self.pos
-        while i > 0 and self.buf[i - 1].isspace():
+        left = self._left.decode("utf-8", errors="replace")
+        i = len(left)
+        while i > 0 and left[i - 1].isspace():
             i -= 1
-        while i > 0 and not self.buf[i - 1].isspace():
+        while i > 0 and not left[i - 1].isspace():
             i -= 1
-        self.buf = self.buf[:i] + self.buf[self.pos:]
-        self.pos = i
+        self._total -= self._pos - i
+        self._pos = i
+        self._left = bytearray(left[:i].encode("utf-8"))
+        self._buf_cache = None
 
     def _ensure_history_browse_started(self) -> None:
         if self.hist_index is None:
             self.hist_saved_current = self.buf
-            self.hist_index = len(self.history)
+            # Snapshot once per browse: deque indexing is O(n) mid-ring
+            self._hist_snapshot = list(self.history)
+            self.hist_index = len(self._hist_snapshot)
 
     def history_prev(self) -> None:
         if not self.history:
@@ -245,127 +426,211 @@ class LineEditor:
         assert self.hist_index is not None
         if self.hist_index > 0:
             self.hist_index -= 1
-        self.set_line(self.history[self.hist_index])
+        self.set_line(self._hist_snapshot[self.hist_index])
 
     def history_next(self) -> None:
         if self.hist_index is None:
             return
         assert self.hist_index is not None
-        if self.hist_index < len(self.history) - 1:
+        if self.hist_index < len(self._hist_snapshot) - 1:
             self.hist_index += 1
-            self.set_line(self.history[self.hist_index])
+            self.set_line(self._hist_snapshot[self.hist_index])
         else:
             self.hist_index = None
+            self._hist_snapshot = None
             self.set_line(self.hist_saved_current)
 
     def commit_history(self, line: str) -> None:
         line = line.rstrip("\n")
+        self.hist_index = None
+        self._hist_snapshot = None
         if not line.strip():
-            self.hist_index = None
             return
         if self.history and self.history[-1] == line:
-            self.hist_index = None
             return
         self.history.append(line)
-        self.hist_index = None
+        if self.on_commit:
+            try:
+                self.on_commit(line)
+            except Exception:
+                pass  # persistence failure must not break editing
 
 
 # =============================================================================
 # Keyboard decoding (raw bytes -> KeyEvent)
 # =============================================================================
 
-def _read_byte(fd: int) -> Optional[int]:
-    b = os.read(fd, 1)
-    if not b:
-        return None
-    return b[0]
+_PASTE_END = b"\x1b[201~"  # bracketed paste terminator (start is CSI 200 ~)
+
+class KeyStream:
+    """
+    Buffered reader over the raw TTY fd.
+
+    One os.read(fd, 4096) refills the buffer; decode_key() then consumes
+    bytes from memory, so a pasted line or escape sequence costs one or two
+    syscalls instead of one per byte.  Any further bytes already pending on
+    the fd are coalesced into the same buffer without blocking.
+    """
+    def __init__(self, fd: int):
+        self.fd = fd
+        self._buffer = bytearray()
+        self._index = 0
+
+    @property
+    def pending(self) -> bool:
+        return self._index < len(self._buffer)
+
+    def _fill(self) -> bool:
+        if self._index < len(self._buffer):
+            return True
+        self._buffer.clear()
+        self._index = 0
+        data = os.read(self.fd, 4096)
+        if not data:
+            return False
+        self._buffer.extend(data)
+        # Coalesce whatever else is already pending (e.g. mid-paste)
+        while select.select([self.fd], [], [], 0)[0]:
+            data = os.read(self.fd, 4096)
+            if not data:
+                break
+            self._buffer.extend(data)
+        return True
+
+    def read_byte(self) -> Optional[int]:
+        if not self._fill():
+            return None
+        b = self._buffer[self._index]
+        self._index += 1
+        return b
 
-def _parse_escape_sequence(fd: int) -> Optional[KeyEvent]:
-    b1 = _read_byte(fd)
+    def read_until(self, terminator: bytes) -> bytes:
+        """Consume and return bytes up to (excluding) terminator."""
+        collected = bytearray()
+        while True:
+            if not self._fill():
+                return bytes(collected)
+            collected += self._buffer[self._index:]
+            self._index = len(self._buffer)
+            found = collected.find(terminator)
+            if found >= 0:
+                # Push unconsumed bytes after the terminator back
+                self._buffer[:] = collected[found + len(terminator):]
+                self._index = 0
+                return bytes(collected[:found])
+
+
+def _read_byte(stream: KeyStream) -> Optional[int]:
+    return stream.read_byte()
+
+def _sanitize_paste(data: bytes) -> str:
+    text = data.decode("utf-8", errors="replace")
+    # Keep the single-line editor buffer free of control characters
+    text = text.replace("\r\n", " ").replace("\r", " ").replace("\n", " ")
+    return "".join(ch for ch in text if ch == " " or ch.isprintable())
+
+# CSI final-byte and "digits ~" code tables, resolved with one dict lookup
+# instead of an if-chain per sequence
+_CSI_FINAL = {
+    ord('A'): _KEY_SINGLETONS[Key.UP],
+    ord('B'): _KEY_SINGLETONS[Key.DOWN],
+    ord('C'): _KEY_SINGLETONS[Key.RIGHT],
+    ord('D'): _KEY_SINGLETONS[Key.LEFT],
+    ord('H'): _KEY_SINGLETONS[Key.HOME],
+    ord('F'): _KEY_SINGLETONS[Key.END],
+}
+_CSI_TILDE = {
+    1: _KEY_SINGLETONS[Key.HOME],
+    7: _KEY_SINGLETONS[Key.HOME],
+    4: _KEY_SINGLETONS[Key.END],
+    8: _KEY_SINGLETONS[Key.END],
+    3: _KEY_SINGLETONS[Key.DELETE],
+}
+_SS3_FINAL = {
+    ord('H'): _KEY_SINGLETONS[Key.HOME],
+    ord('F'): _KEY_SINGLETONS[Key.END],
+}
+
+def _parse_escape_sequence(stream: KeyStream) -> Optional[KeyEvent]:
+    b1 = _read_byte(stream)
     if b1 is None:
         return None
 
     # CSI
-    if b1 == ord('['):
-        b2 = _read_byte(fd)
+    if b1 == 0x5B:  # '['
+        b2 = _read_byte(stream)
         if b2 is None:
             return None
 
-        if b2 in (ord('A'), ord('B'), ord('C'), ord('D')):
-            return KeyEvent({
-                ord('A'): Key.UP,
-                ord('B'): Key.DOWN,
-                ord('C'): Key.RIGHT,
-                ord('D'): Key.LEFT
-            }[b2])
-
-        if b2 == ord('H'):
-            return KeyEvent(Key.HOME)
-        if b2 == ord('F'):
-            return KeyEvent(Key.END)
+        ev = _CSI_FINAL.get(b2)
+        if ev is not None:
+            return ev
 
         # digits + ~
-        if ord('0') <= b2 <= ord('9'):
+        if 0x30 <= b2 <= 0x39:
             digits = [b2]
             while True:
-                bn = _read_byte(fd)
+                bn = _read_byte(stream)
                 if bn is None:
                     return None
-                if ord('0') <= bn <= ord('9'):
+                if 0x30 <= bn <= 0x39:
                     digits.append(bn)
                     continue
                 if bn == ord('~'):
-                    code = int(bytes(digits).decode(errors="replace"))
-                    if code in (1, 7):
-                        return KeyEvent(Key.HOME)
-                    if code in (4, 8):
-                        return KeyEvent(Key.END)
-                    if code == 3:
-                        return KeyEvent(Key.DELETE)
-                    return KeyEvent(Key.ESC)
-                return KeyEvent(Key.ESC)
+                    code = int(bytes(digits))
+                    if code == 200:
+                        # Bracketed paste: emit the whole paste as one CHAR
+                        pasted = stream.read_until(_PASTE_END)
+                        return KeyEvent(Key.CHAR, _sanitize_paste(pasted))
+                    return _CSI_TILDE.get(code, _KEY_SINGLETONS[Key.ESC])
+                return _KEY_SINGLETONS[Key.ESC]
 
     # SS3
-    if b1 == ord('O'):
-        b2 = _read_byte(fd)
+    if b1 == 0x4F:  # 'O'
+        b2 = _read_byte(stream)
         if b2 is None:
             return None
-        if b2 == ord('H'):
-            return KeyEvent(Key.HOME)
-        if b2 == ord('F'):
-            return KeyEvent(Key.END)
-        return KeyEvent(Key.ESC)
-
-    return KeyEvent(Key.ESC)
-
-def decode_key(fd: int) -> Optional[KeyEvent]:
-    b = _read_byte(fd)
+        return _SS3_FINAL.get(b2, _KEY_SINGLETONS[Key.ESC])
+
+    return _KEY_SINGLETONS[Key.ESC]
+
+# 256-entry dispatch table built once at import: byte -> pre-built KeyEvent.
+# Printable ASCII maps to pre-built CHAR singletons too (they are only ever
+# read, never mutated), so the steady-state decode path allocates nothing.
+# 0x1B is left as None and handled explicitly (escape sequences need more
+# bytes), as are unmapped control bytes (dropped).
+_BYTE_TABLE: list = [None] * 256
+for _b, _kind in ((3, Key.CTRL_C), (1, Key.CTRL_A), (5, Key.CTRL_E),
+                  (21, Key.CTRL_U), (11, Key.CTRL_K), (23, Key.CTRL_W),
+                  (16, Key.CTRL_P), (14, Key.CTRL_N),
+                  (10, Key.ENTER), (13, Key.ENTER),
+                  (8, Key.BACKSPACE), (127, Key.BACKSPACE)):
+    _BYTE_TABLE[_b] = _KEY_SINGLETONS[_kind]
+for _b in range(32, 127):
+    _BYTE_TABLE[_b] = KeyEvent(Key.CHAR, chr(_b))
+del _b, _kind
+
+def decode_key(stream: KeyStream) -> Optional[KeyEvent]:
+    b = _read_byte(stream)
     if b is None:
         return None
-
-    # Control keys
-    if b == 3:   return KeyEvent(Key.CTRL_C)
-    if b == 1:   return KeyEvent(Key.CTRL_A)
-    if b == 5:   return KeyEvent(Key.CTRL_E)
-    if b == 21:  return KeyEvent(Key.CTRL_U)
-    if b == 11:  return KeyEvent(Key.CTRL_K)
-    if b == 23:  return KeyEvent(Key.CTRL_W)
-    if b == 16:  return KeyEvent(Key.CTRL_P)
-    if b == 14:  return KeyEvent(Key.CTRL_N)
-
-    if b in (10, 13):
-        return KeyEvent(Key.ENTER)
-
-    if b in (8, 127):
-        return KeyEvent(Key.BACKSPACE)
-
     if b == 27:
-        return _parse_escape_sequence(fd)
-
-    if 32 <= b <= 126:
-        return KeyEvent(Key.CHAR, chr(b))
-
-    return None
+        return _parse_escape_sequence(stream)
+    return _BYTE_TABLE[b]
+
+def decode_keys(stream: KeyStream) -> list:
+    """Decode every complete KeyEvent that is buffered or already pending
+    on the fd, so one wake of the session loop consumes a whole burst."""
+    events: list = []
+    while True:
+        ev = decode_key(stream)
+        if ev is not None:
+            events.append(ev)
+        elif not stream.pending:
+            return events  # EOF or a truncated sequence: stop decoding
+        if not stream.pending  \
+            and not select.select([stream.fd], [], [], 0)[0]:
+            return events
 
 
 # =============================================================================
@@ -378,56 +643,60 @@ class DispatchResult:
     submitted_line: Optional[str] = None
     exit_requested: bool = False
 
-class ReadlineKeymap:
-    def handle(self, editor: LineEditor, ev: KeyEvent) -> DispatchResult:
-        k = ev.kind
-
-        if k == Key.CTRL_C:
-            return DispatchResult(exit_requested=True)
+# Shared results: most keys produce one of these, so allocate them once
+_NOOP = DispatchResult()
+_REDRAW = DispatchResult(redraw=True)
+_EXIT = DispatchResult(exit_requested=True)
 
-        if k == Key.ENTER:
-            line = editor.buf
-            editor.commit_history(line)
-            editor.set_line("")
-            return DispatchResult(submitted_line=line)
-
-        if k == Key.CHAR:
-            editor.insert(ev.text); return DispatchResult(redraw=True)
-
-        if k == Key.BACKSPACE:
-            editor.backspace(); return DispatchResult(redraw=True)
-
-        if k == Key.DELETE:
-            editor.delete(); return DispatchResult(redraw=True)
-
-        if k == Key.LEFT:
-            editor.move_left(); return DispatchResult(redraw=True)
-
-        if k == Key.RIGHT:
-            editor.move_right(); return DispatchResult(redraw=True)
-
-        if k in (Key.HOME, Key.CTRL_A):
-            editor.home(); return DispatchResult(redraw=True)
-
-        if k in (Key.END, Key.CTRL_E):
-            editor.end(); return DispatchResult(redraw=True)
-
-        if k in (Key.UP, Key.CTRL_P):
-            editor.history_prev(); return DispatchResult(redraw=True)
-
-        if k in (Key.DOWN, Key.CTRL_N):
-            editor.history_next(); return DispatchResult(redraw=True)
-
-        if k == Key.CTRL_U:
-            editor.kill_line(); return DispatchResult(redraw=True)
-
-        if k == Key.CTRL_K:
-            editor.kill_to_end(); return DispatchResult(redraw=True)
-
-        if k == Key.CTRL_W:
-            editor.backward_kill_word(); return DispatchResult(redraw=True)
+class ReadlineKeymap:
+    def __init__(self):
+        def edit(method: Callable[[LineEditor], None]):
+            def handler(editor: LineEditor, _ev: KeyEvent) -> DispatchResult:
+                method(editor)
+                return _REDRAW
+            return handler
+
+        # kind --> handler; alias keys (HOME/CTRL_A etc.) share one closure
+        home = edit(LineEditor.home)
+        end = edit(LineEditor.end)
+        history_prev = edit(LineEditor.history_prev)
+        history_next = edit(LineEditor.history_next)
+        self._table = {
+            Key.CTRL_C: lambda _editor, _ev: _EXIT,
+            Key.ENTER: self._handle_enter,
+            Key.CHAR: self._handle_char,
+            Key.BACKSPACE: edit(LineEditor.backspace),
+            Key.DELETE: edit(LineEditor.delete),
+            Key.LEFT: edit(LineEditor.move_left),
+            Key.RIGHT: edit(LineEditor.move_right),
+            Key.HOME: home,
+            Key.CTRL_A: home,
+            Key.END: end,
+            Key.CTRL_E: end,
+            Key.UP: history_prev,
+            Key.CTRL_P: history_prev,
+            Key.DOWN: history_next,
+            Key.CTRL_N: history_next,
+            Key.CTRL_U: edit(LineEditor.kill_line),
+            Key.CTRL_K: edit(LineEditor.kill_to_end),
+            Key.CTRL_W: edit(LineEditor.backward_kill_word),
+        }
+
+    @staticmethod
+    def _handle_char(editor: LineEditor, ev: KeyEvent) -> DispatchResult:
+        editor.insert(ev.text)
+        return _REDRAW
+
+    @staticmethod
+    def _handle_enter(editor: LineEditor, _ev: KeyEvent) -> DispatchResult:
+        line = editor.buf
+        editor.commit_history(line)
+        editor.set_line("")
+        return DispatchResult(submitted_line=line)
 
-        return DispatchResult()
+    def handle(self, editor: LineEditor, ev: KeyEvent) -> DispatchResult:
+        handler = self._table.get(ev.kind)
+        return handler(editor, ev) if handler else _NOOP
 
 
 # =============================================================================
@@ -436,6 +705,27 @@ class ReadlineKeymap:
 
 CSI = "\x1b["
 
+# Memoized per-codepoint display widths (0 for combining marks, 2 for
+# East-Asian wide/fullwidth).  Populated lazily, so it only ever holds
+# codepoints the session has actually seen.
+_char_width_cache: dict = {}
+
+def _char_width(ch: str) -> int:
+    w = _char_width_cache.get(ch)
+    if w is None:
+        if unicodedata.combining(ch):
+            w = 0
+        else:
+            w = 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+        _char_width_cache[ch] = w
+    return w
+
+def _visible_width(s: str) -> int:
+    if s.isascii():  # O(1): checks the str's ASCII flag
+        return len(s)
+    return sum(map(_char_width, s))
+
+
 class WrapAnsiRenderer:
     """
     ANSI renderer that can redraw wrapped input spanning multiple terminal rows.
@@ -446,35 +736,84 @@ class WrapAnsiRenderer:
       - restore cursor position (row/col) within the wrapped layout
     """
 
+    _CLEAR_LINE = b"\r\x1b[2K"  # pre-encoded: the hot path never re-encodes
+
     def __init__(self, out_stream=None):
         self.out = out_stream or sys.stdout
+        try:
+            self._fd: Optional[int] = self.out.fileno()
+        except (AttributeError, OSError):
+            self._fd = None  # non-fd stream: fall back to text writes
         self._last_rows = 1
         self._cur_row = 0  # cursor row within the block [0.._last_rows-1]
+        self._pending: list[bytes] = []  # buffered output, see _flush()
+        self._cols_cache: Optional[int] = None  # refreshed via invalidate_size()
+        # Last fully painted frame: (buf, prompt, cols, lines, avail0, availN).
+        # Keyed on buf identity: LineEditor caches its str, so an unchanged
+        # buffer hands back the same object and cursor-only moves hit here.
+        self._frame_cache: Optional[tuple] = None
+        # (prompt, encoded, display width): the prompt rarely changes, so
+        # encode it and walk its display width once, not per redraw
+        self._prompt_cache: tuple = ("", b"", 0)
+
+    def _prompt_info(self, prompt: str) -> tuple:
+        cached = self._prompt_cache
+        if cached[0] == prompt:
+            return cached
+        cached = (prompt, prompt.encode("utf-8", errors="replace"),
+                  _visible_width(prompt))
+        self._prompt_cache = cached
+        return cached
+
+    def encode_prompt(self, prompt: str) -> bytes:
+        """UTF-8 prompt bytes, cached until the prompt string changes."""
+        return self._prompt_info(prompt)[1]
 
     def _write(self, s: str) -> None:
-        self.out.write(s)
-        self.out.flush()
+        self._pending.append(s.encode("utf-8", errors="replace"))
+
+    def _emit(self, b: bytes) -> None:
+        self._pending.append(b)
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        data = b"".join(self._pending)
+        self._pending.clear()
+        if self._fd is not None:
+            # One write(2) per frame, bypassing the TextIOWrapper layer
+            while data:
+                data = data[os.write(self._fd, data):]
+        else:
+            self.out.write(data.decode("utf-8", errors="replace"))
+            self.out.flush()
 
     def _clear_line(self) -> None:
-        self._write("\r" + CSI + "2K")
+        self._emit(self._CLEAR_LINE)
 
     def _move_up(self, n: int) -> None:
         if n > 0:
-            self._write(CSI + f"{n}A")
+            self._emit(b"\x1b[%dA" % n)
 
     def _move_down(self, n: int) -> None:
         if n > 0:
-            self._write(CSI + f"{n}B")
+            self._emit(b"\x1b[%dB" % n)
 
     def _set_col_1indexed(self, col1: int) -> None:
         # CSI <n> G sets cursor horizontal absolute position (1-indexed)
-        self._write(CSI + f"{max(1, col1)}G")
+        self._emit(b"\x1b[%dG" % max(1, col1))
 
     def _get_cols(self) -> int:
-        try:
-            return max(20, shutil.get_terminal_size(fallback=(80, 24)).columns)
-        except Exception:
-            return 80
+        # The terminal size ioctl is done once per resize, not per redraw:
+        # ReplSession calls invalidate_size() when SIGWINCH is processed.
+        if self._cols_cache is None:
+            self._cols_cache = max(
+                20, shutil.get_terminal_size(fallback=(80, 24)).columns)
+        return self._cols_cache
+
+    def invalidate_size(self) -> None:
+        self._cols_cache = None
+        self._frame_cache = None
 
     def _layout(self, prompt: str, buf: str, pos: int):
         """
@@ -485,50 +824,87 @@ class WrapAnsiRenderer:
         """
         cols = self._get_cols()
         p = prompt
-        indent = " " * len(p)
+        prompt_width = self._prompt_info(p)[2]
+        indent = " " * prompt_width
 
         # Ensure there's room
-        avail0 = max(1, cols - len(p))
-        availN = max(1, cols - len(indent))
+        avail0 = max(1, cols - prompt_width)
+        availN = max(1, cols - prompt_width)
 
         # Split buf into chunks with avail0 then availN
         chunks: list[str] = []
-        if len(buf) <= avail0:
-            chunks = [buf]
+        if buf.isascii():  # fast path: one char == one column
+            if len(buf) <= avail0:
+                chunks = [buf]
+            else:
+                chunks.append(buf[:avail0])
+                rest = buf[avail0:]
+                while rest:
+                    chunks.append(rest[:availN])
+                    rest = rest[availN:]
         else:
-            chunks.append(buf[:avail0])
-            rest = buf[avail0:]
-            while rest:
-                chunks.append(rest[:availN])
-                rest = rest[availN:]
+            chunks = self._chunk_by_width(buf, avail0, availN)
 
         lines = []
         for i, ch in enumerate(chunks):
             lines.append((p if i == 0 else indent) + ch)
 
-        # Cursor mapping: pos is within buf
+        # If buffer is empty, ensure at least one line is shown
+        if not lines:
+            lines = [p]
+
+        cursor_row, cursor_col = self._map_cursor(
+            prompt, buf, pos, avail0, availN)
+        return lines, cursor_row, cursor_col, cols, avail0, availN
+
+    @staticmethod
+    def _chunk_by_width(text: str, avail0: int, availN: int) -> list:
+        """Wrap text into rows by display width (wide=2, combining=0)."""
+        chunks: list = []
+        current: list = []
+        current_width = 0
+        limit = avail0
+        for ch in text:
+            w = _char_width(ch)
+            if current_width + w > limit and current:
+                chunks.append("".join(current))
+                current = []
+                current_width = 0
+                limit = availN
+            current.append(ch)
+            current_width += w
+        chunks.append("".join(current))
+        return chunks
+
+    def _map_cursor(self, prompt: str, buf: str, pos: int,
+                    avail0: int, availN: int):
+        """pos -> (row, col) mapping within the wrapped block.
+
+        O(1) for ASCII buffers; display-width walk up to pos otherwise.
+        """
         if pos < 0:
             pos = 0
         if pos > len(buf):
             pos = len(buf)
 
-        if pos <= avail0:
-            cursor_row = 0
-            cursor_col = len(p) + pos
-        else:
+        prompt_width = self._prompt_info(prompt)[2]
+        if buf.isascii():
+            if pos <= avail0:
+                return 0, prompt_width + pos
             rem = pos - avail0
-            row_in_rest = rem // availN
-            col_in_rest = rem % availN
-            cursor_row = 1 + row_in_rest
-            cursor_col = len(indent) + col_in_rest
-
-        # If buffer is empty, ensure at least one line is shown
-        if not lines:
-            lines = [p]
-            cursor_row = 0
-            cursor_col = len(p)
-
-        return lines, cursor_row, cursor_col, cols
+            return 1 + rem // availN, prompt_width + rem % availN
+
+        row = 0
+        col_width = 0
+        limit = avail0
+        for ch in buf[:pos]:
+            w = _char_width(ch)
+            if col_width + w > limit and col_width:
+                row += 1
+                col_width = 0
+                limit = availN
+            col_width += w
+        return row, prompt_width + col_width
 
     def _move_to_origin(self) -> None:
         # Go to column 1, then up to origin row
@@ -536,7 +912,56 @@ class WrapAnsiRenderer:
         self._move_up(self._cur_row)
 
     def redraw(self, prompt: str, buf: str, pos: int) -> None:
-        lines, cursor_row, cursor_col, _ = self._layout(prompt, buf, pos)
+        # Fast path: unchanged buffer/prompt/width means the painted block is
+        # still correct, so a cursor-only move just repositions the cursor.
+        cols = self._get_cols()
+        cache = self._frame_cache
+        if cache is not None and cache[0] is buf  \
+            and cache[1] == prompt and cache[2] == cols:
+            _, _, _, lines, avail0, availN = cache
+            cursor_row, cursor_col = self._map_cursor(
+                prompt, buf, pos, avail0, availN)
+            self._move_to_origin()
+            self._move_down(cursor_row)
+            self._set_col_1indexed(cursor_col + 1)
+            self._cur_row = cursor_row
+            self._flush()
+            return
+
+        # Incremental path: same prompt/width, single-row ASCII frame whose
+        # buffer changed - emit only the changed suffix instead of clearing
+        # and repainting the block.  Covers ordinary typing and backspace.
+        if cache is not None and cache[1] == prompt and cache[2] == cols  \
+            and self._last_rows == 1 and buf.isascii()  \
+            and cache[0].isascii() and prompt.isascii()  \
+            and len(buf) <= cache[4]:
+            old_buf = cache[0]
+            if buf.startswith(old_buf):      # appended at the end
+                common = len(old_buf)
+            elif old_buf.startswith(buf):    # truncated at the end
+                common = len(buf)
+            else:
+                limit = min(len(buf), len(old_buf))
+                common = 0
+                while common < limit and buf[common] == old_buf[common]:
+                    common += 1
+            prompt_width = len(prompt)
+            self._move_to_origin()
+            self._set_col_1indexed(prompt_width + common + 1)
+            if len(buf) < len(old_buf):
+                self._emit(b"\x1b[0K")  # clear to end of line
+            if buf[common:]:
+                self._write(buf[common:])
+            self._set_col_1indexed(prompt_width + min(pos, len(buf)) + 1)
+            self._cur_row = 0
+            self._last_rows = 1
+            self._frame_cache = (buf, prompt, cols, [prompt + buf],
+                                 cache[4], cache[5])
+            self._flush()
+            return
+
+        lines, cursor_row, cursor_col, cols, avail0, availN =  \
+            self._layout(prompt, buf, pos)
 
         # Choose how many rows to (re)paint: max(old, new)
         new_rows = len(lines)
@@ -561,6 +986,8 @@ class WrapAnsiRenderer:
         # Update state
         self._last_rows = new_rows
         self._cur_row = cursor_row
+        self._frame_cache = (buf, prompt, cols, lines, avail0, availN)
+        self._flush()
 
     def clear_input_block(self) -> None:
         self._move_to_origin()
@@ -573,13 +1000,33 @@ class WrapAnsiRenderer:
         self._set_col_1indexed(1)
         self._last_rows = 1
         self._cur_row = 0
+        self._frame_cache = None  # the block is gone from the screen
+        self._flush()
 
     def atomic_print(self, prompt: str, buf: str, pos: int, msg: str) -> None:
-        # Remove the input block, print the message, then redraw input freshly.
+        self.atomic_print_many(
+            prompt, buf, pos, (msg.encode("utf-8", errors="replace"),))
+
+    def atomic_print_bytes(
+        self, prompt: str, buf: str, pos: int, msg: bytes) -> None:
+        self.atomic_print_many(prompt, buf, pos, (msg,))
+
+    def atomic_print_many(
+        self, prompt: str, buf: str, pos: int, msgs) -> None:
+        # Remove the input block once, print every pending message, then
+        # redraw the input freshly: N messages cost one clear/redraw cycle.
+        # Bytes fast path: pre-encoded messages go out with no re-encode.
         self.clear_input_block()
-        if not msg.endswith("\n"):
-            msg += "\n"
-        self._write(msg)
+        for msg in msgs:
+            # Normalize only the final newline (deliberate trailing blank
+            # lines stay), and since OPOST is off in raw mode, render any
+            # embedded newlines - and the terminator - as explicit CR+LF
+            if msg.endswith(b"\n"):
+                msg = msg[:-1]
+            if b"\n" in msg:
+                msg = msg.replace(b"\n", b"\r\n")
+            self._emit(msg)
+            self._emit(b"\r\n")
         # After printing, we're at start of a fresh line; redraw input block
         self._last_rows = 1
         self._cur_row = 0
@@ -593,7 +1040,8 @@ class WrapAnsiRenderer:
 class ReplSession:
     """
     Public integration surface ...
-    - message_queue: external threads put(str) here for async display.
+    - post_message()/post_message_bytes(): external threads call these for
+      async display (message_queue is a deque of bytes, internal).
     - history_store: optional HistoryStore SPI (load at start, save at exit).
     - renderer: defaults to WrapAnsiRenderer for long-input wrapping.
     - SIGWINCH: resize triggers redraw.
@@ -615,46 +1063,96 @@ class ReplSession:
     ):
         self._line_handler = line_handler
         self._prompt = prompt
+        # Resolve the callable-vs-str branch once: plain str prompts (the
+        # common case) shadow _get_prompt with a constant-returning lambda
+        if not callable(prompt):
+            self._get_prompt = lambda _p=prompt: _p
         self._renderer = renderer or WrapAnsiRenderer()
         self._keymap = keymap or ReadlineKeymap()
-        self._poll_interval = poll_interval
+        self._poll_interval = poll_interval  # legacy: the loop now blocks
         self._history_store = history_store
 
-        # External producers put(str) here. Queue is also used to "wakeup" the loop with "".
-        self.message_queue: "queue.Queue[str]" = queue.Queue()
+        # Producer threads append() here; the REPL thread is the only
+        # consumer.  deque.append/popleft are GIL-atomic in CPython, so the
+        # fan-in path takes no lock; the self-pipe provides the wakeup.
+        self.message_queue: "deque" = deque()
 
-        # Thread control
+        # Thread control.  Resize is a plain bool: a single attribute store
+        # is atomic in CPython and needs none of Event's lock traffic; the
+        # self-pipe byte is the wakeup.  Stop stays an Event since other
+        # threads block on its state via join()/finished.
         self._stop_event = threading.Event()
-        self._resize_event = threading.Event()
+        self._resize_requested = False
         self.finished = threading.Event()
         self._thread: Optional[threading.Thread] = None
 
+        # Submitted lines run on this single worker so a slow handler never
+        # freezes keystroke echo or async message display; one worker keeps
+        # handler execution ordered
+        self._handler_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="repl-handler")
+
+        # Self-pipe: signal handlers and control methods write one byte here
+        # instead of touching stdio/locks, and the select() loop wakes on it
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        # Previous signal wakeup fd, captured by start() and put back when
+        # the session ends (None: set_wakeup_fd was never installed)
+        self._prev_wakeup_fd: Optional[int] = None
+
         # REPL-thread-only state
-        self._editor = LineEditor()
+        self._editor = LineEditor(
+            history_size=getattr(history_store, "max_entries", 2000))
+        if self._history_store is not None:
+            # Append-only persistence per commit; save() remains the compactor
+            self._editor.on_commit = getattr(self._history_store, "append", None)
 
     # -------------------------
     # Public API
     # -------------------------
+    # Producer side is lock-free: deque.append is a single atomic operation
+    # under the GIL, and the wake-pipe write(2) that follows is a full
+    # barrier, so the append is always visible to the REPL thread before
+    # the wakeup lands - no lock or explicit fence needed.
     def post_message(self, text: str) -> None:
         """Thread-safe: request an async message be printed immediately."""
-        self.message_queue.put(text)
+        self.message_queue.append(text.encode("utf-8", errors="replace"))
+        self._wake()
+
+    def post_message_bytes(self, data: bytes) -> None:
+        """Thread-safe fast path: pre-encoded messages skip the str layer."""
+        self.message_queue.append(data)
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass  # pipe full: a wakeup is already pending
 
     def stop(self) -> None:
-        """Thread-safe: request REPL loop stop; main thread may join()."""
+        """Thread- and signal-safe: request REPL loop stop; main thread may join()."""
         self._stop_event.set()
-        # Wake loop
-        self.message_queue.put("")
+        self._wake()
 
     def request_resize(self) -> None:
-        """Thread-safe: request redraw (e.g., call from SIGWINCH handler in main thread)."""
-        self._resize_event.set()
-        # Wake loop
-        self.message_queue.put("")
+        """Thread- and signal-safe: request redraw (e.g., from a SIGWINCH handler)."""
+        self._resize_requested = True
+        self._wake()
 
     def start(self, *, daemon: bool = True, name: str = "repl-session") -> None:
         """Start run() in a background thread (idempotent if already running)."""
         if self._thread and self._thread.is_alive():
             return
+        # Route signals into the self-pipe so handlers never re-enter
+        # stdio/malloc: the select() loop reacts instead (set_wakeup_fd is
+        # main-thread-only; skip quietly when started elsewhere)
+        try:
+            self._prev_wakeup_fd = signal.set_wakeup_fd(
+                self._wake_w, warn_on_full_buffer=False)
+        except ValueError:
+            pass
         self.finished.clear()
         self._thread = threading.Thread(target=self.run, name=name, daemon=daemon)
         self._thread.start()
@@ -663,6 +1161,11 @@ class ReplSession:
         """Wait for background thread to finish."""
         if self._thread:
             self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                return  # timed out: session still running, keep the wakeup fd
+        # run()'s teardown cannot restore the wakeup fd from a background
+        # thread, so the joining (main) thread does it here
+        self._restore_wakeup_fd()
 
     def is_running(self) -> bool:
         return self._thread is not None and self._thread.is_alive()
@@ -673,21 +1176,50 @@ class ReplSession:
     def _get_prompt(self) -> str:
         return self._prompt() if callable(self._prompt) else self._prompt
 
+    def _restore_wakeup_fd(self) -> None:
+        # Mirror of the install in start(): put the previous wakeup fd back
+        # so stopped sessions don't keep receiving signal bytes.  Main-
+        # thread-only; callers on other threads skip quietly and leave it
+        # for join()
+        prev = self._prev_wakeup_fd
+        if prev is None:
+            return
+        try:
+            signal.set_wakeup_fd(prev, warn_on_full_buffer=False)
+        except ValueError:
+            return
+        self._prev_wakeup_fd = None
+
     def _load_history(self) -> None:
         if self._history_store is None:
             return
         try:
             hist = self._history_store.load() or []
-            # Ensure it's a list of str
-            self._editor.history = [str(x) for x in hist]
+            # Ensure it's a deque of str (bounded to the editor's ring size)
+            self._editor.history = deque(
+                (str(x) for x in hist), maxlen=self._editor.history.maxlen)
         except Exception:
             pass
 
+    def _handler_done(self, future) -> None:
+        exc = future.exception()
+        if exc is None:
+            return
+        if isinstance(exc, SystemExit):
+            self.stop()
+        else:
+            # Report and continue
+            self.post_message(f"[handler error] {type(exc).__name__}: {exc}")
+
     def _save_history(self) -> None:
         if self._history_store is None:
             return
+        if self._editor.on_commit is not None:
+            # Lines were persisted append-only as they were committed; the
+            # shutdown full rewrite is redundant (compaction trims the file)
+            return
         try:
-            self._history_store.save(self._editor.history)
+            self._history_store.save(list(self._editor.history))
         except Exception:
             pass
 
@@ -703,85 +1235,146 @@ class ReplSession:
         - Avoid any stdout writes outside renderer/REPL thread.
         """
         fd = sys.stdin.fileno()
+        stdout_fd = sys.stdout.fileno()
         if not sys.stdin.isatty() or not sys.stdout.isatty():
             raise RuntimeError("This REPL expects a TTY for stdin/stdout.")
 
         self._load_history()
         prompt = self._get_prompt()
 
+        stream = KeyStream(fd)
+
+        # Pre-bind hot attributes: the loop body runs per keystroke, and
+        # LOAD_FAST beats repeated attribute lookups on self
+        editor = self._editor
+        renderer = self._renderer
+        keymap_handle = self._keymap.handle
+        get_prompt = self._get_prompt
+        message_queue = self.message_queue
+        stop_is_set = self._stop_event.is_set
+        wake_r = self._wake_r
+        os_read = os.read
+        os_write = os.write
+
+        # Register both fds once: the per-tick select.select() rebuilt its
+        # fd lists and kernel poll set on every call, where the selector
+        # (epoll on Linux) keeps its registrations across waits
+        selector = selectors.DefaultSelector()
+        selector.register(fd, selectors.EVENT_READ)
+        selector.register(wake_r, selectors.EVENT_READ)
+        selector_select = selector.select
+
         try:
             with RawTTY(fd):
                 # Initial draw
-                self._renderer.redraw(prompt, self._editor.buf, self._editor.pos)
-
-                while not self._stop_event.is_set():
-                    # 1) Drain async messages (and wakeups)
-                    while True:
-                        try:
-                            msg = self.message_queue.get_nowait()
-                        except queue.Empty:
+                renderer.redraw(prompt, editor.buf, editor.pos)
+
+                wake_fired = True  # check producer state on the first pass
+                while True:
+                    needs_redraw = False
+
+                    # 1+2) Resize flag and message drain are only worth
+                    #    checking after a pipe wakeup: key-only ticks (the
+                    #    common case while typing) skip both checks, and any
+                    #    message posted meanwhile has a pipe byte pending.
+                    #    stop() always wakes the pipe too, so the stop event
+                    #    only needs checking here rather than every tick.
+                    if wake_fired:
+                        wake_fired = False
+                        if stop_is_set():
                             break
-                        if msg:
-                            prompt = self._get_prompt()
-                            self._renderer.atomic_print(prompt, self._editor.buf, self._editor.pos, msg)
-
-                    # 2) Handle resize requests
-                    if self._resize_event.is_set():
-                        self._resize_event.clear()
-                        prompt = self._get_prompt()
-                        self._renderer.redraw(prompt, self._editor.buf, self._editor.pos)
 
-                    # 3) Poll stdin for keypress
-                    r, _, _ = select.select([fd], [], [], self._poll_interval)
-                    if not r:
-                        continue
-
-                    ev = decode_key(fd)
-                    if ev is None:
-                        continue
+                        # Resize: invalidate the cached width now, repaint
+                        # once at the end of the tick
+                        if self._resize_requested:
+                            self._resize_requested = False
+                            renderer.invalidate_size()
+                            needs_redraw = True
+
+                        # Drain async messages, print once
+                        msgs = []
+                        while message_queue:
+                            msg = message_queue.popleft()
+                            if msg:
+                                if not isinstance(msg, bytes):
+                                    # Producers appending str directly
+                                    msg = str(msg).encode(
+                                        "utf-8", errors="replace")
+                                msgs.append(msg)
+                        if msgs:
+                            prompt = get_prompt()
+                            renderer.atomic_print_many(
+                                prompt, editor.buf, editor.pos, msgs)
+                            needs_redraw = False  # atomic_print_many repainted
+
+                    # 3) Block until a keypress or a pipe wakeup (skip when
+                    #    bytes are buffered); no timeout, so the idle loop
+                    #    costs zero CPU
+                    key_ready = stream.pending
+                    if not key_ready and not needs_redraw:
+                        for key, _ in selector_select():
+                            if key.fd == wake_r:
+                                try:  # drain wakeup/signal bytes
+                                    os_read(wake_r, 4096)
+                                except OSError:
+                                    pass
+                                wake_fired = True
+                            else:
+                                key_ready = True
+
+                    # 4) Decode the whole ready burst, then dispatch; the
+                    #    repaint happens once below, so a paste or typing
+                    #    burst costs one redraw, not one per KeyEvent.
+                    events = decode_keys(stream) if key_ready else ()
+                    stopping = False
+                    for ev in events:
+                        result = keymap_handle(editor, ev)
+
+                        if result.exit_requested:
+                            self.stop()
+                            stopping = True
+                            break
 
-                    result = self._keymap.handle(self._editor, ev)
+                        if result.submitted_line is not None:
+                            submitted = result.submitted_line
 
-                    if result.exit_requested:
-                        self.stop()
-                        break
+                            # Clear current wrapped input block, print committed
+                            # line cleanly: one write(2), no TextIOWrapper lock
+                            prompt = get_prompt()
+                            renderer.clear_input_block()
+                            os_write(stdout_fd,
+                                renderer.encode_prompt(prompt)
+                                + submitted.encode("utf-8", errors="replace")
+                                + b"\r\n")
 
-                    if result.submitted_line is not None:
-                        submitted = result.submitted_line
+                            # Run handler on the worker; the REPL thread keeps
+                            # servicing keys and messages meanwhile
+                            future = self._handler_executor.submit(
+                                self._line_handler, submitted, self)
+                            future.add_done_callback(self._handler_done)
 
-                        # Clear current wrapped input block, print committed line cleanly
-                        prompt = self._get_prompt()
-                        self._renderer.clear_input_block()
-                        sys.stdout.write(prompt + submitted + "\n")
-                        sys.stdout.flush()
+                            needs_redraw = True
 
-                        # Run handler in REPL thread
-                        try:
-                            self._line_handler(submitted, self)
-                        except SystemExit:
-                            self.stop()
-                        except Exception as e:
-                            # Report and continue
-                            self.post_message(f"[handler error] {type(e).__name__}: {e}")
+                        needs_redraw |= result.redraw
 
-                        # Redraw prompt + current editor state
-                        prompt = self._get_prompt()
-                        self._renderer.redraw(prompt, self._editor.buf, self._editor.pos)
-                        continue
+                    if stopping:
+                        break
 
-                    if result.redraw:
-                        prompt = self._get_prompt()
-                        self._renderer.redraw(prompt, self._editor.buf, self._editor.pos)
+                    if needs_redraw:
+                        prompt = get_prompt()
+                        renderer.redraw(prompt, editor.buf, editor.pos)
 
         finally:
             # Always attempt to restore a sane terminal line
+            selector.close()
+            self._restore_wakeup_fd()  # no-op off the main thread; see join()
+            self._handler_executor.shutdown(wait=False)
             try:
                 self._save_history()
             except Exception:
                 pass
             try:
-                sys.stdout.write("\n")
-                sys.stdout.flush()
+                os.write(stdout_fd, b"\n")
             except Exception:
                 pass
             self.finished.set()
@@ -810,11 +1403,12 @@ if __name__ == "__main__":
             "REPL_HISTORY", os.path.expanduser(REPL_HISTORY_PATHNAME))
         history_store = FileHistoryStore(hist_path, max_entries=2000)
 
-    def producer(q: "queue.Queue[str]") -> None:
+    def producer(session: ReplSession) -> None:
         i = 0
         while True:
             i += 1
-            q.put(f"[external] message {i} @ {time.strftime('%H:%M:%S')}")
+            session.post_message(
+                f"[external] message {i} @ {time.strftime('%H:%M:%S')}")
             time.sleep(2)
 
     session = ReplSession(
@@ -823,5 +1417,5 @@ if __name__ == "__main__":
         history_store=history_store,
     )
 
-    threading.Thread(target=producer, args=(session.message_queue,), daemon=True).start()
+    threading.Thread(target=producer, args=(session,), daemon=True).start()
     session.run()